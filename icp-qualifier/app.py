@@ -6,6 +6,7 @@ Run: streamlit run app.py
 import io
 import os
 import sys
+import tempfile
 from pathlib import Path
 
 import pandas as pd
@@ -25,6 +26,14 @@ except Exception:
 from config import config
 from profiles import get_profile, get_result_columns
 
+# Heavy modules imported once at startup, not per interaction — Streamlit
+# re-runs the script top to bottom on every widget change, and deferred
+# imports inside branches paid pandas/anthropic import cost on first touch.
+# Playwright stays lazy inside run_analysis.
+from analyze import run_analysis
+from cache import CompanyCache
+from main import _normalize_columns
+
 st.set_page_config(page_title="ICP Qualifier", page_icon="🔍", layout="centered")
 
 st.title("ICP Qualifier")
@@ -41,11 +50,9 @@ with st.sidebar:
     st.divider()
     st.subheader("Cache")
     use_cache = st.checkbox("Use cache", value=True, help="Skip already analyzed companies across sessions")
-    from cache import CompanyCache
     _cache = CompanyCache()
     _s = _cache.stats()
     st.caption(f"Records: {_s['total']} | Oldest: {_s['oldest'][:10] if _s['oldest'] else '-'} | Newest: {_s['newest'][:10] if _s['newest'] else '-'}")
-    import tempfile
     with tempfile.NamedTemporaryFile(mode="w", suffix=".csv", delete=False) as _tmp:
         _export_path = _tmp.name
     _cache.export_to_csv(_export_path)
@@ -94,11 +101,9 @@ else:
         try:
             content = uploaded.read().decode("utf-8")
             sep = "\t" if "\t" in content.split("\n")[0] else ","
-            df_input = pd.read_csv(io.StringIO(content), sep=sep, dtype=str, engine="python").fillna("")
+            df_input = pd.read_csv(io.StringIO(content), sep=sep, dtype=str, engine="c", na_filter=False)
             if list(df_input.columns) == list(range(len(df_input.columns))) or all(str(c).isdigit() for c in df_input.columns):
-                df_input = pd.read_csv(io.StringIO(content), sep=sep, dtype=str, header=None, engine="python").fillna("")
-            # Normalize columns
-            from main import _normalize_columns
+                df_input = pd.read_csv(io.StringIO(content), sep=sep, dtype=str, header=None, engine="c", na_filter=False)
             df_input = _normalize_columns(df_input)
             df_input = df_input[df_input["Company Name"].str.strip() != ""].reset_index(drop=True)
             if "Website" not in df_input.columns:
@@ -133,7 +138,6 @@ if df_input is not None and st.button("Run analysis", type="primary"):
             progress_bar.progress(current / total, text=f"{current}/{total} — {msg}")
 
     with st.spinner("Analyzing..."):
-        from analyze import run_analysis
         df_result = run_analysis(df_input, None, progress_callback=on_progress)
 
     progress_bar.empty()
@@ -7,6 +7,8 @@ import threading
 from datetime import datetime, timezone
 from pathlib import Path
 
+import orjson
+
 from config import config
 
 PROMPTS_DIR = Path(__file__).resolve().parent / "prompts"
@@ -81,6 +83,170 @@ def _extract_neutral(data: dict) -> dict:
     return out
 
 
+class PageCache:
+    """Disk cache for fetched page text and screenshots, keyed by normalized URL.
+
+    Makes reruns (prompt/profile tuning) skip the network entirely; entries
+    expire after PAGE_CACHE_TTL_DAYS so stale sites get re-fetched.
+    """
+
+    def __init__(self):
+        self._path = config.PAGE_CACHE_FILE
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self._path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS page_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT,
+                cached_at TEXT
+            )
+        """)
+        return conn
+
+    def get(self, key: str) -> str | None:
+        if not key:
+            return None
+        with self._lock:
+            conn = self._connect()
+            try:
+                row = conn.execute(
+                    "SELECT value, cached_at FROM page_cache WHERE key = ?", (key,)
+                ).fetchone()
+            finally:
+                conn.close()
+        if not row:
+            return None
+        try:
+            age = datetime.now(timezone.utc) - datetime.fromisoformat(row[1])
+            if age.days >= config.PAGE_CACHE_TTL_DAYS:
+                return None
+        except (TypeError, ValueError):
+            return None
+        return row[0]
+
+    def set(self, key: str, value: str) -> None:
+        if not key or not value:
+            return
+        with self._lock:
+            conn = self._connect()
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO page_cache (key, value, cached_at) VALUES (?, ?, ?)",
+                    (key, value, datetime.now(timezone.utc).isoformat()),
+                )
+                conn.commit()
+            finally:
+                conn.close()
+
+    def clear(self) -> None:
+        with self._lock:
+            conn = self._connect()
+            try:
+                conn.execute("DELETE FROM page_cache")
+                conn.commit()
+            finally:
+                conn.close()
+
+
+def page_cache_key(website: str, kind: str = "text") -> str:
+    """Cache key for a fetch: normalized domain + what was fetched + size tag."""
+    key = _normalize_website(website)
+    if not key:
+        return ""
+    if kind == "screenshot":
+        # Tag tracks the encode settings in utils.py so re-tuning quality/edge
+        # invalidates old entries rather than serving stale encodes
+        return f"{key}|shot|1024q60"
+    return f"{key}|{kind}|{config.PAGE_TEXT_LIMIT}"
+
+
+class ResponseCache:
+    """Disk cache for parsed Claude responses, keyed by a hash of the full
+    request (system prompt, user prompt, screenshot, model).
+
+    Identical prompts across reruns skip the model call entirely; the key
+    covers everything that could change the answer, so no version bookkeeping
+    is needed. Shares the page-cache DB file, own table.
+    """
+
+    def __init__(self):
+        self._path = config.PAGE_CACHE_FILE
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self._path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS response_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT,
+                cached_at TEXT
+            )
+        """)
+        return conn
+
+    def get(self, key: str) -> dict | None:
+        if not key:
+            return None
+        with self._lock:
+            conn = self._connect()
+            try:
+                row = conn.execute(
+                    "SELECT value, cached_at FROM response_cache WHERE key = ?", (key,)
+                ).fetchone()
+            finally:
+                conn.close()
+        if not row:
+            return None
+        try:
+            age = datetime.now(timezone.utc) - datetime.fromisoformat(row[1])
+            if age.days >= config.PAGE_CACHE_TTL_DAYS:
+                return None
+            return orjson.loads(row[0])
+        except (TypeError, ValueError):
+            return None
+
+    def set(self, key: str, value: dict) -> None:
+        if not key or not value:
+            return
+        with self._lock:
+            conn = self._connect()
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO response_cache (key, value, cached_at) VALUES (?, ?, ?)",
+                    (key, orjson.dumps(value).decode(), datetime.now(timezone.utc).isoformat()),
+                )
+                conn.commit()
+            finally:
+                conn.close()
+
+    def clear(self) -> None:
+        with self._lock:
+            conn = self._connect()
+            try:
+                conn.execute("DELETE FROM response_cache")
+                conn.commit()
+            finally:
+                conn.close()
+
+
+def response_cache_key(system_prompt: str | None, prompt: str, screenshot: bytes | None, model: str) -> str:
+    """blake2b over everything that shapes the model's answer."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update((system_prompt or "").encode())
+    h.update(b"\x00")
+    h.update(prompt.encode())
+    h.update(b"\x00")
+    if screenshot:
+        h.update(hashlib.blake2b(screenshot, digest_size=16).digest())
+    h.update(b"\x00")
+    h.update(model.encode())
+    return h.hexdigest()
+
+
 class CompanyCache:
     def __init__(self):
         self._path = config.CACHE_FILE
@@ -14,17 +14,31 @@ class Config:
     JINA_API_KEY: str = os.getenv("JINA_API_KEY", "")
 
     MODEL: str = "claude-haiku-4-5"
+    # Output budget per call — answers are a small fixed JSON object, and
+    # output tokens are billed per call
+    MAX_OUTPUT_TOKENS: int = 300
     PROFILE: str = "dance_studios"
     USE_SCREENSHOTS: bool = False
     INPUT_FILE: str = str(PROJECT_DIR / "input.csv")
     OUTPUT_FILE: str = str(PROJECT_DIR / "output.csv")
+    # Parquet is the working/resume format (small, fast to re-read); CSV stays
+    # as the user-facing export written once at the end.
+    OUTPUT_PARQUET: str = str(PROJECT_DIR / "output.parquet")
 
     WORKERS: int = 3
     MAX_RETRIES: int = 3
     RETRY_WAIT: int = 10
 
+    # Message Batches API: ~50% cheaper, no per-request rate limits, but results
+    # arrive only when the whole batch ends — use for big offline runs, not the UI.
+    USE_BATCH_API: bool = False
+    BATCH_POLL_INTERVAL: int = 30
+
     JINA_TIMEOUT: int = 25
     JINA_RETRIES: int = 3
+    # Cap on simultaneous Jina requests, independent of WORKERS — keeps a big
+    # fan-out under the reader quota instead of burning retries on 429s.
+    JINA_MAX_CONCURRENCY: int = 16
     JINA_MIN_LENGTH: int = 100
     PAGE_TEXT_LIMIT: int = 6000
     PROCESSED_TEXT_LIMIT: int = 1500
@@ -36,6 +50,13 @@ class Config:
     CACHE_FILE: str = str(PROJECT_DIR / "cache.db")
     CACHE_EXPORT_FILE: str = str(PROJECT_DIR / "cache_export.csv")
 
+    USE_PAGE_CACHE: bool = True
+    PAGE_CACHE_FILE: str = str(PROJECT_DIR / "page_cache.db")
+    PAGE_CACHE_TTL_DAYS: int = 7
+    # Skip Claude calls whose exact request (system+prompt+screenshot+model)
+    # was answered within the page-cache TTL
+    USE_RESPONSE_CACHE: bool = True
+
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
     LOG_FILE: str = str(PROJECT_DIR / "icp-qualifier.log")
 
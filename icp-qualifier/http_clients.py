@@ -0,0 +1,41 @@
+"""Shared httpx clients with tuned connection pools.
+
+httpx.AsyncClient binds to the event loop it first runs on, and run_analysis
+starts a fresh loop per invocation (asyncio.run) — so a plain module-level
+singleton would break on the second Streamlit run. Clients are cached per
+event loop instead and closed explicitly at the end of each run.
+"""
+
+import asyncio
+import logging
+
+import httpx
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+_jina_clients: dict[asyncio.AbstractEventLoop, httpx.AsyncClient] = {}
+
+
+def get_jina_client() -> httpx.AsyncClient:
+    """Return the Jina reader client for the current event loop, creating it
+    on first use. The auth header lives on the client, not per request."""
+    loop = asyncio.get_running_loop()
+    client = _jina_clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=50, max_connections=200),
+            timeout=httpx.Timeout(config.JINA_TIMEOUT, connect=5.0),
+            headers={"Authorization": f"Bearer {config.JINA_API_KEY}"},
+        )
+        _jina_clients[loop] = client
+    return client
+
+
+async def close_jina_client() -> None:
+    """Close and drop the current loop's Jina client (call before the loop ends)."""
+    client = _jina_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None and not client.is_closed:
+        await client.aclose()
@@ -36,8 +36,26 @@ Website_style — choose exactly one:
 
 _STYLE_JSON = ',\n  "website_style": "Legacy" or "Mixed" or "Modern"'
 
+# Everything before this marker is invariant across rows and goes to the
+# system prompt, where Anthropic's prompt cache can reuse it between calls.
+_USER_SPLIT_MARKER = "Company: {company_name}"
 
-def load_prompt() -> str:
+
+def load_prompt() -> tuple[str, str]:
+    """Return (system_prompt, user_template) for the active profile.
+
+    The static instruction block becomes the system prompt (cacheable server-
+    side); the per-company section with {company_name}/{page_text} stays in
+    the user template.
+    """
+    template = _load_template()
+    pos = template.find(_USER_SPLIT_MARKER)
+    if pos == -1:
+        return "", template
+    return template[:pos].rstrip(), template[pos:]
+
+
+def _load_template() -> str:
     path = PROMPTS_DIR / f"{config.PROFILE}.txt"
     if not path.exists():
         available = [f.stem for f in PROMPTS_DIR.glob("*.txt")]
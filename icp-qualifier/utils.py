@@ -1,42 +1,115 @@
 import asyncio
 import base64
-import json
+import heapq
+import io
+import random
 import re
 import logging
 
 import anthropic
 import httpx
+import orjson
+from PIL import Image
 
 from config import config
+from cache import PageCache, ResponseCache, page_cache_key, response_cache_key
 
 logger = logging.getLogger(__name__)
 
+# Vision tokens and upload time scale with image bytes — cap the screenshot
+# at a 1024px edge and re-encode as optimized progressive JPEG before base64.
+# Claude bills images by pixel count; 1024px is plenty for layout/style calls.
+SCREENSHOT_MAX_EDGE = 1024
+SCREENSHOT_QUALITY = 60
+_BLOCKED_RESOURCE_TYPES = {"font", "media"}
+
+
+async def _block_heavy_resources(route):
+    if route.request.resource_type in _BLOCKED_RESOURCE_TYPES:
+        await route.abort()
+    else:
+        await route.continue_()
+
+# Per-loop Jina semaphores: asyncio primitives bind to the loop they first run
+# on, and run_analysis starts a fresh loop per invocation (same pattern as
+# http_clients.py).
+_JINA_SEMS: dict[asyncio.AbstractEventLoop, asyncio.Semaphore] = {}
+
+
+def _jina_sem() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    sem = _JINA_SEMS.get(loop)
+    if sem is None:
+        sem = _JINA_SEMS[loop] = asyncio.Semaphore(config.JINA_MAX_CONCURRENCY)
+    return sem
+
+
+async def _backoff(attempt: int, headers=None) -> None:
+    """Sleep before a retry: honor Retry-After when the server sent one,
+    otherwise capped exponential backoff with jitter so concurrent workers
+    don't retry in lockstep."""
+    retry_after = headers.get("retry-after") if headers else None
+    if retry_after and retry_after.isdigit():
+        delay = min(60.0, float(retry_after))
+    else:
+        delay = min(30, 2 ** attempt) + random.random()
+    await asyncio.sleep(delay)
+
+
 SIGNAL_WORDS = frozenset(
     "payment fintech saas platform api dashboard pricing b2b product subscription app integration demo".split()
 )
 
+# All cleanup rules fused into one alternation so preprocess_page_text walks
+# the page exactly once instead of once per rule
+_FUSED_RE = re.compile(
+    r"(?P<junk>(?i:cookie\s*policy|privacy\s*policy|terms\s*of\s*service|accept\s*cookies|we\s*use\s*cookies)[^.]*\.?)"
+    r"|(?P<url>https?://\S+)"
+    r"|\[(?P<mdtext>[^\]]+)\]\([^)]+\)"
+    r"|(?P<nl>\n{3,})"
+    r"|(?P<nlsp>\n[ \t]+)"
+    r"|(?P<sp>[ \t]+)"
+)
+_FUSED_OUT = {"junk": "", "url": "", "nl": "\n\n", "nlsp": "\n", "sp": " "}
+
+
+def _fused_repl(m: re.Match) -> str:
+    g = m.lastgroup
+    if g == "mdtext":
+        return m.group("mdtext")
+    return _FUSED_OUT[g]
+
+
+_SIGNAL_RE = re.compile(r"\b(?:" + "|".join(map(re.escape, sorted(SIGNAL_WORDS))) + r")\b")
+
+
+def _score(p: str) -> int:
+    """Count distinct signal words in a paragraph. The alternation yields only
+    the hits — no per-word list of the whole paragraph to intersect."""
+    return len(set(_SIGNAL_RE.findall(p.lower())))
+
 
 def preprocess_page_text(raw_text: str, max_chars: int = 1500) -> str:
     """Clean page text, filter paragraphs, prioritize signal words, truncate."""
     if not raw_text or not raw_text.strip():
         return ""
     text = raw_text.strip()
-    # Remove junk: cookie banners, privacy policy, URLs, markdown links, excess newlines
-    text = re.sub(r"(?i)(cookie\s*policy|privacy\s*policy|terms\s*of\s*service|accept\s*cookies|we\s*use\s*cookies)[^.]*\.?", "", text)
-    text = re.sub(r"https?://[^\s]+", "", text)
-    text = re.sub(r"\[([^\]]+)\]\([^)]+\)", r"\1", text)
-    text = re.sub(r"\n{3,}", "\n\n", text)
-    text = re.sub(r"[ \t]+", " ", text)
-    text = re.sub(r"\n +", "\n", text).strip()
+    # Remove junk (cookie banners, privacy policy, URLs, markdown links) and
+    # collapse whitespace — all in a single pass
+    text = _FUSED_RE.sub(_fused_repl, text).strip()
     # Split into paragraphs, keep len > 40
     paragraphs = [p.strip() for p in text.split("\n\n") if p.strip() and len(p.strip()) > 40]
     if not paragraphs:
         return text[:max_chars] if text else ""
-    # Prioritize paragraphs with signal words
-    def _score(p: str) -> int:
-        words = set(re.findall(r"\b\w+\b", p.lower()))
-        return sum(1 for w in words if w in SIGNAL_WORDS)
-    paragraphs.sort(key=lambda p: -_score(p))
+    # Prioritize paragraphs with signal words. Only ~max_chars worth survives
+    # the truncation below, so take the top-k (O(n log k)) instead of sorting
+    # everything; paragraphs are >40 chars, so k sized from that floor always
+    # covers the budget.
+    k = max_chars // 41 + 1
+    if len(paragraphs) > k:
+        paragraphs = heapq.nlargest(k, paragraphs, key=_score)
+    else:
+        paragraphs.sort(key=_score, reverse=True)
     out = "\n\n".join(paragraphs)
     return out[:max_chars]
 
@@ -47,99 +120,213 @@ async def fetch_page_async(website: str, http_client: httpx.AsyncClient) -> str
     if not website.startswith("http"):
         website = f"https://{website}"
 
+    cache_key = page_cache_key(website) if config.USE_PAGE_CACHE else ""
+    if cache_key:
+        cached = PageCache().get(cache_key)
+        if cached is not None:
+            logger.debug("Jina %s: page cache hit", website)
+            return cached
+
     url = f"https://r.jina.ai/{website}"
-    headers = {"Authorization": f"Bearer {config.JINA_API_KEY}"}
     last_err = None
     for attempt in range(config.JINA_RETRIES):
         try:
-            resp = await http_client.get(url, headers=headers, timeout=config.JINA_TIMEOUT)
-            if resp.status_code >= 400:
-                last_err = f"status {resp.status_code}"
+            # Auth header lives on the shared client (see http_clients.py).
+            # Stream the body and stop at PAGE_TEXT_LIMIT — everything past the
+            # limit would be decoded only to be sliced off.
+            buf = bytearray()
+            async with _jina_sem():
+                async with http_client.stream("GET", url, timeout=config.JINA_TIMEOUT) as resp:
+                    status = resp.status_code
+                    retry_after = resp.headers.get("retry-after")
+                    encoding = resp.encoding or "utf-8"
+                    if status < 400:
+                        async for chunk in resp.aiter_bytes(chunk_size=16384):
+                            buf.extend(chunk)
+                            if len(buf) >= config.PAGE_TEXT_LIMIT:
+                                break
+            if status == 429:
+                last_err = "rate limited (429)"
+                if attempt == config.JINA_RETRIES - 1:
+                    logger.warning("Jina %s: %s (after %d retries)", website, last_err, config.JINA_RETRIES)
+                    return None
+                await _backoff(attempt, {"retry-after": retry_after} if retry_after else None)
+                continue
+            if status >= 400:
+                last_err = f"status {status}"
                 logger.warning("Jina %s: %s", website, last_err)
                 return None
-            text = resp.text
+            text = bytes(buf[: config.PAGE_TEXT_LIMIT]).decode(encoding, errors="replace")
             if len(text) < config.JINA_MIN_LENGTH:
                 last_err = f"text too short ({len(text)} chars)"
                 logger.warning("Jina %s: %s", website, last_err)
                 return None
-            out = text[: config.PAGE_TEXT_LIMIT]
+            out = text
             logger.debug("Jina %s: ok, %d chars", website, len(out))
+            if cache_key:
+                PageCache().set(cache_key, out)
             return out
         except (httpx.TimeoutException, httpx.RequestError) as e:
             last_err = str(e)
             if attempt == config.JINA_RETRIES - 1:
                 logger.warning("Jina %s: %s (after %d retries)", website, last_err, config.JINA_RETRIES)
                 return None
-            await asyncio.sleep(2)
+            await _backoff(attempt)
     return None
 
 
 async def fetch_page_playwright_async(page, url: str, timeout: int = 20000) -> str | None:
     """Fallback: get page text via Playwright when Jina fails (bypasses bot blocks)."""
+    cache_key = page_cache_key(url, kind="pw") if config.USE_PAGE_CACHE else ""
+    if cache_key:
+        cached = PageCache().get(cache_key)
+        if cached is not None:
+            return cached
     try:
         await page.goto(url, wait_until="domcontentloaded", timeout=timeout)
         await page.wait_for_timeout(1500)
         text = await page.inner_text("body")
         if not text or len(text.strip()) < config.JINA_MIN_LENGTH:
             return None
-        return text[: config.PAGE_TEXT_LIMIT]
+        out = text[: config.PAGE_TEXT_LIMIT]
+        if cache_key:
+            PageCache().set(cache_key, out)
+        return out
     except Exception as e:
         logger.warning("Playwright fallback %s: %s", url, e)
         return None
 
 
-async def take_screenshot_async(page, url: str, timeout: int = 15000) -> str | None:
+async def take_screenshot_async(page, url: str, timeout: int = 15000) -> bytes | None:
+    """Return the re-encoded screenshot as raw JPEG bytes; base64 happens only
+    at the API boundary (call_claude_async), not per intermediate hop."""
+    cache_key = page_cache_key(url, kind="screenshot") if config.USE_PAGE_CACHE else ""
+    if cache_key:
+        cached = PageCache().get(cache_key)
+        if cached is not None:
+            return base64.b64decode(cached)
     try:
+        if not getattr(page, "_resources_blocked", False):
+            await page.route("**/*", _block_heavy_resources)
+            page._resources_blocked = True
         await page.goto(url, wait_until="domcontentloaded", timeout=timeout)
         await page.wait_for_timeout(2000)
-        buf = await page.screenshot(type="jpeg", quality=65, full_page=False)
-        out = base64.b64encode(buf).decode("ascii")
-        del buf
-        return out
+        buf = await page.screenshot(
+            type="jpeg", quality=SCREENSHOT_QUALITY, full_page=False,
+            clip={"x": 0, "y": 0, "width": 1280, "height": 800},
+        )
+        im = Image.open(io.BytesIO(buf))
+        if max(im.size) > SCREENSHOT_MAX_EDGE:
+            im.thumbnail((SCREENSHOT_MAX_EDGE, SCREENSHOT_MAX_EDGE), Image.LANCZOS)
+        out_buf = io.BytesIO()
+        im.convert("RGB").save(out_buf, "JPEG", quality=SCREENSHOT_QUALITY, optimize=True, progressive=True)
+        raw = out_buf.getvalue()
+        if cache_key:
+            # Cache column is TEXT — store base64 there, hand back raw bytes
+            PageCache().set(cache_key, base64.b64encode(raw).decode("ascii"))
+        return raw
     except Exception as e:
         logger.warning(f"Screenshot failed for {url}: {e}")
         return None
 
 
+def build_system_blocks(system_prompt: str | None) -> list | None:
+    """System blocks with an ephemeral cache_control so the shared instruction
+    prefix is prompt-cached server-side across calls (5 min window)."""
+    if not system_prompt:
+        return None
+    return [{"type": "text", "text": system_prompt, "cache_control": {"type": "ephemeral"}}]
+
+
+# Identical requests issued concurrently (sites sharing a parked-domain page,
+# duplicate rows that slipped past dedupe) collapse onto one API call: the
+# first caller owns the Future, the rest await it. Keyed per event loop —
+# Futures, like the clients, bind to the loop they were created on.
+_INFLIGHT: dict[tuple, asyncio.Future] = {}
+
+
 async def call_claude_async(
     client: anthropic.AsyncAnthropic,
     prompt: str,
-    screenshot_b64: str | None = None,
+    screenshot: bytes | None = None,
     model: str | None = None,
+    system_prompt: str | None = None,
+) -> dict | None:
+    model = model or config.MODEL
+    loop = asyncio.get_running_loop()
+    key = (loop, response_cache_key(system_prompt, prompt, screenshot, model))
+    existing = _INFLIGHT.get(key)
+    if existing is not None:
+        return await existing
+    fut = loop.create_future()
+    _INFLIGHT[key] = fut
+    try:
+        out = await _call_claude_once(client, prompt, screenshot, model, system_prompt)
+        fut.set_result(out)
+        return out
+    except BaseException:
+        fut.cancel()
+        raise
+    finally:
+        _INFLIGHT.pop(key, None)
+
+
+async def _call_claude_once(
+    client: anthropic.AsyncAnthropic,
+    prompt: str,
+    screenshot: bytes | None,
+    model: str,
+    system_prompt: str | None,
 ) -> dict | None:
+    cache_key = ""
+    if config.USE_RESPONSE_CACHE:
+        cache_key = response_cache_key(system_prompt, prompt, screenshot, model)
+        cached = ResponseCache().get(cache_key)
+        if cached is not None:
+            logger.debug("Claude response cache hit")
+            return cached
+
     content = []
-    if screenshot_b64:
+    if screenshot:
         content.append({
             "type": "image",
             "source": {
                 "type": "base64",
                 "media_type": "image/jpeg",
-                "data": screenshot_b64,
+                "data": base64.b64encode(screenshot).decode("ascii"),
             },
         })
     content.append({"type": "text", "text": prompt})
 
-    model = model or config.MODEL
+    kwargs = {}
+    system = build_system_blocks(system_prompt)
+    if system is not None:
+        kwargs["system"] = system
+
     for attempt in range(config.MAX_RETRIES):
         try:
             response = await client.messages.create(
                 model=model,
-                max_tokens=300,
+                max_tokens=config.MAX_OUTPUT_TOKENS,
                 messages=[{"role": "user", "content": content}],
+                **kwargs,
             )
             out = parse_json_response(response)
             if out is None:
                 logger.warning("Claude returned invalid JSON (parse failed)")
+            elif cache_key:
+                ResponseCache().set(cache_key, out)
             return out
-        except anthropic.RateLimitError:
+        except anthropic.RateLimitError as e:
             if attempt < config.MAX_RETRIES - 1:
-                logger.warning(f"Rate limit hit, waiting {config.RETRY_WAIT}s...")
-                await asyncio.sleep(config.RETRY_WAIT)
+                logger.warning("Rate limit hit, backing off...")
+                resp = getattr(e, "response", None)
+                await _backoff(attempt, getattr(resp, "headers", None))
         except anthropic.APIError as e:
             logger.warning(f"API error on attempt {attempt + 1}: {e}")
             if attempt == config.MAX_RETRIES - 1:
                 return None
-            await asyncio.sleep(2)
+            await _backoff(attempt)
         except Exception as e:
             logger.warning(f"Unexpected error on attempt {attempt + 1}: {e}")
             if attempt == config.MAX_RETRIES - 1:
@@ -147,37 +334,61 @@ async def call_claude_async(
     return None
 
 
+_FENCE_START = re.compile(r"^```(?:json)?\s*")
+_FENCE_END = re.compile(r"\s*```$")
+
+
 def parse_json_response(response) -> dict | None:
     try:
         text = response.content[0].text.strip()
-        text = re.sub(r"^```(?:json)?\s*", "", text)
-        text = re.sub(r"\s*```$", "", text)
-        return json.loads(text)
-    except (json.JSONDecodeError, IndexError, AttributeError) as e:
+        # Most responses carry no fences — skip the regex work entirely then
+        if text.startswith("```"):
+            text = _FENCE_START.sub("", text)
+        if text.endswith("```"):
+            text = _FENCE_END.sub("", text)
+        return orjson.loads(text)
+    except (orjson.JSONDecodeError, IndexError, AttributeError) as e:
         logger.debug("JSON parse error: %s", e)
         return None
 
 
+# One IGNORECASE alternation walks the page once instead of ~10 separate
+# substring scans over a PAGE_TEXT_LIMIT-sized string
+_STACK_RE = re.compile(
+    r"wp-content|wordpress|webflow|framer\.com|framerusercontent|ghost\.io"
+    r"|squarespace|wix\.com|wixsite|hubspot|shopify",
+    re.IGNORECASE,
+)
+_STACK_MAP = {
+    "wp-content": "WordPress",
+    "wordpress": "WordPress",
+    "webflow": "Webflow",
+    "framer.com": "Framer",
+    "framerusercontent": "Framer",
+    "ghost.io": "Ghost",
+    "squarespace": "Squarespace",
+    "wix.com": "Wix",
+    "wixsite": "Wix",
+    "hubspot": "HubSpot CMS",
+    "shopify": "Shopify",
+}
+_CMS_RE = re.compile(r"cms", re.IGNORECASE)
+# Same precedence as the original check chain — position in the page text
+# must not decide (a WordPress site can mention a Shopify partner first)
+_STACK_PRIORITY = ("WordPress", "Webflow", "Framer", "Ghost", "Squarespace", "Wix", "HubSpot CMS", "Shopify")
+
+
 def detect_stack(page_text: str, website: str) -> str:
-    text_lower = page_text.lower()
-    site_lower = website.lower()
-
-    if "wp-content" in text_lower or "wordpress" in text_lower:
-        return "WordPress"
-    if "webflow" in text_lower or ".webflow.io" in site_lower:
-        return "Webflow"
-    if "framer.com" in text_lower or "framerusercontent" in text_lower:
-        return "Framer"
-    if "ghost.io" in text_lower:
-        return "Ghost"
-    if "squarespace" in text_lower:
-        return "Squarespace"
-    if "wix.com" in text_lower or "wixsite" in text_lower:
-        return "Wix"
-    if "hubspot" in text_lower and "cms" in text_lower:
-        return "HubSpot CMS"
-    if "shopify" in text_lower:
-        return "Shopify"
+    hits = {_STACK_MAP[m.group(0).lower()] for m in _STACK_RE.finditer(page_text)}
+    if ".webflow.io" in website.lower():
+        hits.add("Webflow")
+    # Tracking snippets mention HubSpot everywhere — only call it the CMS when
+    # the page says so. IGNORECASE search avoids lower-casing the whole text.
+    if "HubSpot CMS" in hits and not _CMS_RE.search(page_text):
+        hits.discard("HubSpot CMS")
+    for label in _STACK_PRIORITY:
+        if label in hits:
+            return label
     return "custom / unknown"
 
 